@@ -17,15 +17,20 @@ def main() -> None:
 	args = hcb.cli.parse_args()
 	hcb.cli.validate_args(args)
 
-	base_volume = hcb.volume.build_hilbert_volume(args.dimension)
+	base_path = hcb.volume.build_hilbert_path(args.dimension)
 	scale = hcb.volume.compute_scale(args.dimension, args.target_size)
-	scaled_volume = hcb.volume.scale_volume(base_volume, scale, args.scale_y)
+
+	if args.write_pngs or args.npz_output:
+		scaled_volume = base_path.rasterize(scale, args.scale_y)
+
+	if args.npz_output:
+		hcb.volume.write_volume_npz(scaled_volume, args.npz_output)
 
 	if args.write_pngs:
+		# The grid overlay edits in place, so it runs after the NPZ export.
 		png_volume = scaled_volume
 		if args.add_grid:
-			# Copy to avoid mutating the scaled volume used elsewhere.
-			png_volume = hcb.volume.apply_grid_overlay(png_volume.copy(), (scale * 2) + 4)
+			png_volume = hcb.volume.apply_grid_overlay(png_volume, (scale * 2) + 4)
 		hcb.volume.write_slices(
 			png_volume,
 			args.axis,
@@ -34,13 +39,14 @@ def main() -> None:
 			args.invert,
 			args.normalize,
 			args.slice_start,
-			args.slice_end
+			args.slice_end,
+			args.png_compress_level
 		)
 
 	if args.ldr_output:
 		ldr_scale = args.ldr_scale if args.ldr_scale is not None else scale
 		ldr_scale_y = args.ldr_scale_y if args.ldr_scale_y is not None else args.scale_y
-		ldr_volume = hcb.volume.scale_volume(base_volume, ldr_scale, ldr_scale_y)
+		ldr_volume = base_path.rasterize(ldr_scale, ldr_scale_y)
 		bricks = hcb.ldraw.volume_to_bricks(ldr_volume, args.ldr_threshold)
 		title = f"{args.prefix}{args.dimension}"
 		hcb.ldraw.write_ldraw(bricks, args.ldr_output, args.ldr_color, title)
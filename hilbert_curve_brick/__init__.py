@@ -6,7 +6,7 @@ Hilbert curve helpers for LEGO-compatible brick outputs.
 import importlib
 
 
-__all__ = ["cli", "curve", "ldraw", "volume"]
+__all__ = ["bitops", "cli", "curve", "ldraw", "volume"]
 
 
 #============================================
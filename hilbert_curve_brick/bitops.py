@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""
+Compiled bit helpers for Numba kernels.
+"""
+
+# PIP3 modules
+import numba
+import numba.cpython.unsafe.numbers
+
+
+#============================================
+@numba.njit(cache=True, inline='always')
+def ctz64(value: int) -> int:
+	"""
+	Count trailing zero bits of a uint64 with the hardware instruction.
+
+	Numba has no public trailing-zero count, so this wraps the intrinsic
+	from numba.cpython.unsafe.numbers, an internal module. It is the only
+	use of that module; pip_requirements.txt pins numba to the 0.68 series,
+	the only release this has been tested with.
+
+	Args:
+		value: Nonzero uint64 value.
+
+	Returns:
+		int: Index of the lowest set bit.
+	"""
+	count = numba.cpython.unsafe.numbers.trailing_zeros(value)
+	return count
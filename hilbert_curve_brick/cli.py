@@ -91,6 +91,14 @@ def parse_args() -> argparse.Namespace:
 		help='Disable PNG output.'
 	)
 	output_group.set_defaults(write_pngs=True)
+	output_group.add_argument(
+		'-z', '--write-npz', dest='npz_output', type=str, default='',
+		help='Also write the scaled volume to this compressed .npz file.'
+	)
+	output_group.add_argument(
+		'-C', '--png-compress-level', dest='png_compress_level', type=int, default=1,
+		help='PNG zlib compression level 0-9 (default 1, faster writes, slightly larger files).'
+	)
 
 	ldr_group = parser.add_argument_group("ldraw options")
 	ldr_group.add_argument(
@@ -102,8 +110,8 @@ def parse_args() -> argparse.Namespace:
 		help='LDraw color index (default 15).'
 	)
 	ldr_group.add_argument(
-		'--ldr-threshold', dest='ldr_threshold', type=float, default=0.5,
-		help='Threshold for voxel occupancy.'
+		'--ldr-threshold', dest='ldr_threshold', type=int, default=128,
+		help='Threshold for voxel occupancy, 0-255 (default 128).'
 	)
 	ldr_group.add_argument(
 		'--ldr-scale', dest='ldr_scale', type=int, default=None,
@@ -151,6 +159,8 @@ def validate_args(args: argparse.Namespace) -> None:
 		raise ValueError("target-size must be at least 1")
 	if args.scale_y < 1:
 		raise ValueError("scale-y must be at least 1")
+	if not 0 <= args.png_compress_level <= 9:
+		raise ValueError("png-compress-level must be between 0 and 9")
 	if args.ldr_scale is not None and args.ldr_scale < 1:
 		raise ValueError("ldr-scale must be at least 1")
 	if args.ldr_scale_y is not None and args.ldr_scale_y < 1:
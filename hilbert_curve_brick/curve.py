@@ -3,9 +3,19 @@
 Hilbert curve encode/decode helpers.
 """
 
-# Standard Library
-import math
-
+# PIP3 modules
+import numba
+import numpy
+
+# Morton bit-scatter masks for three 21-bit coordinates in 64 bits.
+MORTON3_MASKS = (
+	0x1F00000000FFFF,
+	0x1F0000FF0000FF,
+	0x100F00F00F00F00F,
+	0x10C30C30C30C30C3,
+	0x1249249249249249,
+)
+MORTON3_MAX_BITS = 21
 
 #============================================
 def int_to_hilbert(index: int, n_dimensions: int = 2) -> tuple:
@@ -19,6 +29,9 @@ def int_to_hilbert(index: int, n_dimensions: int = 2) -> tuple:
 	Returns:
 		tuple: Coordinate tuple in n_dimensions space.
 	"""
+	if n_dimensions == 3:
+		coords = int_to_hilbert3(index)
+		return coords
 	index_chunks = unpack_index(index, n_dimensions)
 	chunk_count = len(index_chunks)
 	mask = 2 ** n_dimensions - 1
@@ -32,6 +45,29 @@ def int_to_hilbert(index: int, n_dimensions: int = 2) -> tuple:
 	return coords
 
 
+#============================================
+def int_to_hilbert_batch(count: int, n_dimensions: int = 3) -> numpy.ndarray:
+	"""
+	Convert Hilbert indices 0 to count - 1 into coordinates.
+
+	Coordinates are below count, so int32 holds them for any batch that
+	fits in memory.
+
+	Args:
+		count: Number of indices to convert, below 2 ** 31.
+		n_dimensions: Number of dimensions.
+
+	Returns:
+		numpy.ndarray: (count, n_dimensions) int32 coordinates.
+	"""
+	# Leading zero chunks do not change the curve, so size chunks for the last index.
+	last_index = max(0, count - 1)
+	chunk_count = max(1, (last_index.bit_length() + n_dimensions - 1) // n_dimensions)
+	_, first_end = initial_start_end(chunk_count, n_dimensions)
+	coords = _int_to_hilbert_batch_nb(count, n_dimensions, chunk_count, first_end)
+	return coords
+
+
 #============================================
 def hilbert_to_int(coords: tuple) -> int:
 	"""
@@ -118,7 +154,8 @@ def unpack_index(index: int, n_dimensions: int) -> list:
 		list: Index chunks.
 	"""
 	base = 2 ** n_dimensions
-	chunk_count = max(1, int(math.ceil(math.log(index + 1, base))))
+	# Count base 2**n_dimensions digits with integer math, never a float log.
+	chunk_count = max(1, (int(index).bit_length() + n_dimensions - 1) // n_dimensions)
 	chunks = [0] * chunk_count
 	value = index
 	for chunk_index in range(chunk_count - 1, -1, -1):
@@ -158,7 +195,10 @@ def unpack_coords(coords: tuple) -> list:
 		list: Coordinate chunks.
 	"""
 	biggest = max(coords)
-	chunk_count = max(1, int(math.ceil(math.log(biggest + 1, 2))))
+	chunk_count = max(1, int(biggest).bit_length())
+	if len(coords) == 3 and chunk_count <= MORTON3_MAX_BITS:
+		chunks = transpose_bits3(coords[0], coords[1], coords[2], chunk_count)
+		return chunks
 	chunks = transpose_bits(coords, chunk_count)
 	return chunks
 
@@ -175,6 +215,9 @@ def pack_coords(chunks: list, n_dimensions: int) -> tuple:
 	Returns:
 		tuple: Coordinate tuple.
 	"""
+	if n_dimensions == 3 and len(chunks) <= MORTON3_MAX_BITS:
+		coords_tuple = untranspose_bits3(chunks)
+		return coords_tuple
 	coords = transpose_bits(chunks, n_dimensions)
 	coords_tuple = tuple(coords)
 	return coords_tuple
@@ -204,6 +247,83 @@ def transpose_bits(values: list, destination_bits: int) -> list:
 	return dests
 
 
+#============================================
+def transpose_bits3(x_value: int, y_value: int, z_value: int, bit_count: int) -> list:
+	"""
+	Transpose three coordinates into 3-bit chunks with Morton bit scatter.
+
+	Same result as transpose_bits((x, y, z), bit_count) for bit_count up
+	to MORTON3_MAX_BITS, using O(log bits) mask steps per coordinate.
+
+	Args:
+		x_value: X coordinate, high bit of each chunk.
+		y_value: Y coordinate.
+		z_value: Z coordinate, low bit of each chunk.
+		bit_count: Number of chunks to produce.
+
+	Returns:
+		list: 3-bit chunks, most significant first.
+	"""
+	# Interleave the coordinates so each 3-bit group is one chunk.
+	morton = (_spread_bits3(x_value) << 2) | (_spread_bits3(y_value) << 1) | _spread_bits3(z_value)
+	chunks = [0] * bit_count
+	for chunk_index in range(bit_count):
+		chunks[chunk_index] = (morton >> (3 * (bit_count - 1 - chunk_index))) & 7
+	return chunks
+
+
+#============================================
+def untranspose_bits3(chunks: list) -> tuple:
+	"""
+	Inverse of transpose_bits3: gather 3-bit chunks back into coordinates.
+
+	Args:
+		chunks: 3-bit chunks, most significant first, at most MORTON3_MAX_BITS.
+
+	Returns:
+		tuple: (x, y, z) coordinates.
+	"""
+	morton = 0
+	for chunk in chunks:
+		morton = (morton << 3) | chunk
+	coords = (_compact_bits3(morton >> 2), _compact_bits3(morton >> 1), _compact_bits3(morton))
+	return coords
+
+
+#============================================
+def _spread_bits3(value: int) -> int:
+	"""
+	Spread the low 21 bits of a value to every third bit.
+
+	Args:
+		value: Coordinate value.
+
+	Returns:
+		int: Value with two zero bits after each original bit.
+	"""
+	spread = int(value) & 0x1FFFFF
+	for shift, mask in zip((32, 16, 8, 4, 2), MORTON3_MASKS):
+		spread = (spread | (spread << shift)) & mask
+	return spread
+
+
+#============================================
+def _compact_bits3(value: int) -> int:
+	"""
+	Gather every third bit of a value into the low 21 bits.
+
+	Args:
+		value: Interleaved value.
+
+	Returns:
+		int: Compacted coordinate.
+	"""
+	compact = value & MORTON3_MASKS[-1]
+	for shift, mask in zip((2, 4, 8, 16, 32), MORTON3_MASKS[-2::-1] + (0x1FFFFF,)):
+		compact = (compact | (compact >> shift)) & mask
+	return compact
+
+
 #============================================
 def gray_encode(value: int) -> int:
 	"""
@@ -232,14 +352,22 @@ def gray_decode(value: int) -> int:
 	Returns:
 		int: Decoded value.
 	"""
-	shift = 1
+	# Prefix XOR with a fixed shift ladder covers every value up to 64 bits.
 	decoded = value
-	while True:
-		div = decoded >> shift
-		decoded ^= div
-		if div <= 1:
-			return decoded
+	decoded ^= decoded >> 1
+	decoded ^= decoded >> 2
+	decoded ^= decoded >> 4
+	decoded ^= decoded >> 8
+	decoded ^= decoded >> 16
+	decoded ^= decoded >> 32
+	# Wider values keep doubling the shift.
+	# int() accepts numpy integers, which have no bit_length.
+	bit_count = int(value).bit_length()
+	shift = 64
+	while shift < bit_count:
+		decoded ^= decoded >> shift
 		shift <<= 1
+	return decoded
 
 
 #============================================
@@ -304,3 +432,166 @@ def child_start_end(parent_start: int, parent_end: int, mask: int, index: int) -
 	child_start = gray_encode_travel(parent_start, parent_end, mask, start_index)
 	child_end = gray_encode_travel(parent_start, parent_end, mask, end_index)
 	return child_start, child_end
+
+
+#============================================
+def _build_travel_tables3() -> tuple:
+	"""
+	Precompute 3D Gray-travel chunks and child corners for every state.
+
+	Tables are indexed by (start << 6) | (end << 3) | chunk_value.
+
+	Returns:
+		tuple: (travel, child_start, child_end) uint8 arrays of length 512.
+	"""
+	mask = 7
+	travel = numpy.zeros(512, dtype=numpy.uint8)
+	child_start = numpy.zeros(512, dtype=numpy.uint8)
+	child_end = numpy.zeros(512, dtype=numpy.uint8)
+	for start in range(8):
+		for end in range(8):
+			for chunk_value in range(8):
+				key = (start << 6) | (end << 3) | chunk_value
+				travel[key] = gray_encode_travel(start, end, mask, chunk_value)
+				child_start[key], child_end[key] = child_start_end(start, end, mask, chunk_value)
+	tables = (travel, child_start, child_end)
+	return tables
+
+
+# Lookup tables for the 3D hot paths, built once the helpers above exist.
+TRAVEL3_TABLE, CHILD_START3_TABLE, CHILD_END3_TABLE = _build_travel_tables3()
+
+
+# Python lists index faster than numpy arrays for scalar lookups.
+TRAVEL3_LIST = TRAVEL3_TABLE.tolist()
+CHILD_START3_LIST = CHILD_START3_TABLE.tolist()
+CHILD_END3_LIST = CHILD_END3_TABLE.tolist()
+
+
+#============================================
+def int_to_hilbert3(index: int) -> tuple:
+	"""
+	3D int_to_hilbert using the precomputed travel tables.
+
+	Args:
+		index: Hilbert index.
+
+	Returns:
+		tuple: (x, y, z) coordinates.
+	"""
+	chunk_count = max(1, (int(index).bit_length() + 2) // 3)
+	start, end = initial_start_end(chunk_count, 3)
+	coord_chunks = [0] * chunk_count
+	for chunk_index in range(chunk_count):
+		key = (start << 6) | (end << 3) | ((index >> (3 * (chunk_count - 1 - chunk_index))) & 7)
+		coord_chunks[chunk_index] = TRAVEL3_LIST[key]
+		start = CHILD_START3_LIST[key]
+		end = CHILD_END3_LIST[key]
+	coords = pack_coords(coord_chunks, 3)
+	return coords
+
+
+#============================================
+@numba.njit(cache=True, inline='always')
+def _gray_encode_nb(value: int) -> int:
+	"""
+	Compiled form of gray_encode.
+	"""
+	encoded = value ^ (value >> 1)
+	return encoded
+
+
+#============================================
+@numba.njit(cache=True, inline='always')
+def _gray_encode_travel_nb(start: int, end: int, mask: int, index: int) -> int:
+	"""
+	Compiled form of gray_encode_travel.
+	"""
+	travel_bit = start ^ end
+	modulus = mask + 1
+	encoded = _gray_encode_nb(index) * (travel_bit * 2)
+	rotated = (encoded | (encoded // modulus)) & mask
+	result = rotated ^ start
+	return result
+
+
+#============================================
+@numba.njit(cache=True, inline='always')
+def _child_start_end_nb(parent_start: int, parent_end: int, mask: int, index: int) -> tuple:
+	"""
+	Compiled form of child_start_end.
+	"""
+	start_index = max(0, (index - 1) & ~1)
+	end_index = min(mask, (index + 1) | 1)
+	child_start = _gray_encode_travel_nb(parent_start, parent_end, mask, start_index)
+	child_end = _gray_encode_travel_nb(parent_start, parent_end, mask, end_index)
+	return child_start, child_end
+
+
+#============================================
+@numba.njit(cache=True)
+def _int_to_hilbert_nb(
+		index: int,
+		n_dimensions: int,
+		chunk_count: int,
+		first_end: int,
+		coord_row: numpy.ndarray
+	) -> None:
+	"""
+	Compiled form of int_to_hilbert writing into a zeroed coordinate row.
+
+	Args:
+		index: Hilbert index.
+		n_dimensions: Number of dimensions.
+		chunk_count: Number of index chunks.
+		first_end: End corner of the top-level cube.
+		coord_row: Preallocated int32 or int64 output of length n_dimensions.
+	"""
+	mask = (1 << n_dimensions) - 1
+	start = numpy.int64(0)
+	end = numpy.int64(first_end)
+	for chunk_index in range(chunk_count):
+		# Index chunks are base 2**n_dimensions digits, most significant first.
+		shift = n_dimensions * (chunk_count - 1 - chunk_index)
+		chunk_value = (index >> shift) & mask
+		if n_dimensions == 3:
+			# Table lookups replace the Gray-travel math for the 3D curve.
+			key = (start << 6) | (end << 3) | chunk_value
+			coord_chunk = numpy.int64(TRAVEL3_TABLE[key])
+			next_start = numpy.int64(CHILD_START3_TABLE[key])
+			next_end = numpy.int64(CHILD_END3_TABLE[key])
+		else:
+			coord_chunk = _gray_encode_travel_nb(start, end, mask, chunk_value)
+			next_start, next_end = _child_start_end_nb(start, end, mask, chunk_value)
+		# Transpose the chunk bits straight into the output coordinates.
+		for dim_index in range(n_dimensions):
+			bit = (coord_chunk >> (n_dimensions - 1 - dim_index)) & 1
+			coord_row[dim_index] = (coord_row[dim_index] << 1) | bit
+		start = next_start
+		end = next_end
+
+
+#============================================
+@numba.njit(cache=True, parallel=True)
+def _int_to_hilbert_batch_nb(
+		count: int,
+		n_dimensions: int,
+		chunk_count: int,
+		first_end: int
+	) -> numpy.ndarray:
+	"""
+	Convert indices 0 to count - 1 in parallel.
+
+	Args:
+		count: Number of indices.
+		n_dimensions: Number of dimensions.
+		chunk_count: Number of index chunks.
+		first_end: End corner of the top-level cube.
+
+	Returns:
+		numpy.ndarray: (count, n_dimensions) int32 coordinates.
+	"""
+	coords = numpy.zeros((count, n_dimensions), dtype=numpy.int32)
+	for index in numba.prange(count):
+		_int_to_hilbert_nb(index, n_dimensions, chunk_count, first_end, coords[index])
+	return coords
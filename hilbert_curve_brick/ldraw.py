@@ -5,10 +5,15 @@ LDraw export helpers.
 
 # Standard Library
 import os
+import dataclasses
 
 # PIP3 modules
+import numba
 import numpy
 
+# local repo modules
+import hilbert_curve_brick.bitops
+
 
 CELL_LDU = 40
 BRICK_HEIGHT_LDU = 24
@@ -16,6 +21,12 @@ BRICK_HEIGHT_LDU = 24
 ROT_IDENTITY = (1, 0, 0, 0, 1, 0, 0, 0, 1)
 ROT_Y_90 = (0, 0, 1, 0, 1, 0, -1, 0, 0)
 
+# Pre-rendered rotation fields for the two matrices bricks use.
+ROT_STRS = {
+	ROT_IDENTITY: "1 0 0 0 1 0 0 0 1",
+	ROT_Y_90: "0 0 1 0 1 0 -1 0 0",
+}
+
 PART_2X2 = {
 	"id": "3003.dat",
 	"size_x": 1,
@@ -41,277 +52,407 @@ PART_2X2X3 = {
 	"height": 3,
 }
 
+# Column codes: BrickSet stores indices into these tuples.
+PARTS = (PART_2X2, PART_2X4, PART_2X6, PART_2X2X3)
+ROTS = (ROT_IDENTITY, ROT_Y_90)
+PART_2X2X3_ID = 3
+
+# Layer footprints (size_x, size_z) in greedy trial order; 1x1 always fits.
+TILE_SIZES = numpy.array(((3, 1), (1, 3), (2, 1), (1, 2), (1, 1)), dtype=numpy.int32)
+
+
+#============================================
+def _build_tile_choice() -> numpy.ndarray:
+	"""
+	Map free run lengths in +X and +Z to the greedy footprint choice.
+
+	Every footprint is one cell thick in X or Z, so it fits exactly when
+	its sizes are within the free runs starting at the cell.
+
+	Returns:
+		numpy.ndarray: (4, 4) int32 TILE_SIZES index per (run_x, run_z), runs 1-3.
+	"""
+	choice = numpy.full((4, 4), -1, dtype=numpy.int32)
+	for run_x in range(1, 4):
+		for run_z in range(1, 4):
+			for size_index, (size_x, size_z) in enumerate(TILE_SIZES.tolist()):
+				if size_x <= run_x and size_z <= run_z:
+					choice[run_x, run_z] = size_index
+					break
+	return choice
+
+
+TILE_CHOICE = _build_tile_choice()
+
 
 #============================================
-def volume_to_bricks(volume: numpy.ndarray, threshold: float) -> list:
+@dataclasses.dataclass(eq=False)
+class BrickSet:
+	"""
+	Brick placements stored as parallel columns.
+
+	Iterating, indexing, or slicing yields the placement dictionaries that
+	volume_to_bricks used to return as a list. A BrickSet is not a list,
+	so comparing it to one with == is False; compare to_list() instead.
+
+	Attributes:
+		part_ids: uint8 indices into PARTS.
+		xs: int32 X centers in LDU.
+		ys: int32 Y centers in LDU.
+		zs: int32 Z centers in LDU.
+		rot_ids: uint8 indices into ROTS.
+	"""
+	part_ids: numpy.ndarray
+	xs: numpy.ndarray
+	ys: numpy.ndarray
+	zs: numpy.ndarray
+	rot_ids: numpy.ndarray
+
+	#============================================
+	def __len__(self) -> int:
+		"""
+		Return the number of bricks.
+		"""
+		return len(self.xs)
+
+	#============================================
+	def __getitem__(self, index):
+		"""
+		Return one brick, or a list of bricks for a slice, as placement dictionaries.
+
+		Args:
+			index: Brick index or slice.
+
+		Returns:
+			dict | list: Brick placement, or a list of them for a slice.
+		"""
+		if isinstance(index, slice):
+			sliced = BrickSet(
+				part_ids=self.part_ids[index],
+				xs=self.xs[index],
+				ys=self.ys[index],
+				zs=self.zs[index],
+				rot_ids=self.rot_ids[index],
+			)
+			bricks = sliced.to_list()
+			return bricks
+		brick = {
+			"part": PARTS[self.part_ids[index]]["id"],
+			"x": int(self.xs[index]),
+			"y": int(self.ys[index]),
+			"z": int(self.zs[index]),
+			"rot": ROTS[self.rot_ids[index]],
+		}
+		return brick
+
+	#============================================
+	def __iter__(self):
+		"""
+		Yield each brick as a placement dictionary.
+		"""
+		columns = (self.part_ids, self.xs, self.ys, self.zs, self.rot_ids)
+		for part_id, x_ldu, y_ldu, z_ldu, rot_id in zip(*(column.tolist() for column in columns)):
+			brick = {
+				"part": PARTS[part_id]["id"],
+				"x": x_ldu,
+				"y": y_ldu,
+				"z": z_ldu,
+				"rot": ROTS[rot_id],
+			}
+			yield brick
+
+	#============================================
+	def to_list(self) -> list:
+		"""
+		Return every brick as a list of placement dictionaries.
+
+		Returns:
+			list: Brick placements in placement order.
+		"""
+		bricks = list(self)
+		return bricks
+
+
+#============================================
+def volume_to_bricks(
+		volume: numpy.ndarray,
+		threshold: int,
+		occupied_out: numpy.ndarray = None,
+		covered_out: numpy.ndarray = None
+	) -> BrickSet:
 	"""
 	Convert a volume into LDraw brick placements.
 
+	Callers that run many conversions (threshold sweeps) can pass the two
+	bool mask buffers to reuse them instead of allocating per call.
+
 	Args:
-		volume: Input volume.
-		threshold: Occupancy threshold.
+		volume: Input uint8 volume.
+		threshold: Occupancy threshold in volume units (0-255).
+		occupied_out: Optional bool buffer of volume.shape for the occupancy mask.
+		covered_out: Optional bool buffer of volume.shape; holds every placed
+			cell afterwards.
 
 	Returns:
-		list: Brick placement dictionaries.
+		BrickSet: Brick placements in placement order.
 	"""
-	occupied = volume >= threshold
-	covered = numpy.zeros(occupied.shape, dtype=numpy.bool_)
-	bricks = []
+	for buffer in (occupied_out, covered_out):
+		if buffer is None:
+			continue
+		if buffer.dtype != numpy.bool_ or buffer.shape != volume.shape:
+			raise ValueError("mask buffers must be bool arrays of volume.shape")
+	if occupied_out is None:
+		occupied = volume >= threshold
+	else:
+		occupied = numpy.greater_equal(volume, threshold, out=occupied_out)
+	if covered_out is None:
+		covered = numpy.zeros(occupied.shape, dtype=numpy.bool_)
+	else:
+		covered = covered_out
+		covered.fill(False)
 
 	x_size, y_size, z_size = occupied.shape
 
 	# Place 2x2x3 bricks on vertical runs first.
-	for y_index in range(0, y_size - 2):
-		for z_index in range(z_size):
-			for x_index in range(x_size):
-				if not occupied[x_index, y_index, z_index]:
-					continue
-				if covered[x_index, y_index, z_index]:
-					continue
-				if covered[x_index, y_index + 1, z_index]:
-					continue
-				if covered[x_index, y_index + 2, z_index]:
-					continue
-				if not occupied[x_index, y_index + 1, z_index]:
-					continue
-				if not occupied[x_index, y_index + 2, z_index]:
-					continue
-				brick = _make_brick(
-					PART_2X2X3,
-					x_index,
-					y_index,
-					z_index,
-					rot=ROT_IDENTITY,
-				)
-				bricks.append(brick)
-				covered[x_index, y_index, z_index] = True
-				covered[x_index, y_index + 1, z_index] = True
-				covered[x_index, y_index + 2, z_index] = True
+	starts = _vertical_brick_starts(occupied)
+	# Mark each brick's three cells; transposing gives the y, z, x placement order.
+	y_cells, z_cells, x_cells = numpy.nonzero(starts.transpose(1, 2, 0))
+	for offset in range(3):
+		covered[x_cells, y_cells + offset, z_cells] = True
+	part_ids = [numpy.full(x_cells.size, PART_2X2X3_ID, dtype=numpy.uint8)]
+	rot_ids = [numpy.zeros(x_cells.size, dtype=numpy.uint8)]
+	xs = [x_cells * CELL_LDU + CELL_LDU // 2]
+	ys = [y_cells * BRICK_HEIGHT_LDU + (3 * BRICK_HEIGHT_LDU) // 2]
+	zs = [z_cells * CELL_LDU + CELL_LDU // 2]
 
 	# Tile remaining cells with 2x6, 2x4, and 2x2 bricks.
 	for y_index in range(y_size):
 		layer_occ = occupied[:, y_index, :]
 		layer_covered = covered[:, y_index, :]
-		layer_bricks = _tile_layer(layer_occ, layer_covered, y_index)
-		bricks.extend(layer_bricks)
-
+		tiles = _tile_layer(layer_occ, layer_covered)
+		x_cells, z_cells, size_x, size_z = tiles.T
+		# Footprints are one cell thick, so marking along X then Z covers every cell.
+		for offset in range(3):
+			along_x = size_x > offset
+			layer_covered[x_cells[along_x] + offset, z_cells[along_x]] = True
+			along_z = size_z > offset
+			layer_covered[x_cells[along_z], z_cells[along_z] + offset] = True
+		# Footprints are 1, 2, or 3 cells, matching PARTS order; 1-wide X means rotated.
+		part_ids.append((size_x * size_z - 1).astype(numpy.uint8))
+		rot_ids.append((size_z > 1).astype(numpy.uint8))
+		xs.append(x_cells * CELL_LDU + (size_x * CELL_LDU) // 2)
+		ys.append(numpy.full(x_cells.size, y_index * BRICK_HEIGHT_LDU + BRICK_HEIGHT_LDU // 2))
+		zs.append(z_cells * CELL_LDU + (size_z * CELL_LDU) // 2)
+
+	bricks = BrickSet(
+		part_ids=numpy.concatenate(part_ids),
+		xs=numpy.concatenate(xs).astype(numpy.int32),
+		ys=numpy.concatenate(ys).astype(numpy.int32),
+		zs=numpy.concatenate(zs).astype(numpy.int32),
+		rot_ids=numpy.concatenate(rot_ids),
+	)
 	return bricks
 
 
 #============================================
-def write_ldraw(bricks: list, output_path: str, color: int, title: str) -> None:
+def write_ldraw(bricks: BrickSet, output_path: str, color: int, title: str) -> None:
 	"""
 	Write LDraw bricks to a file.
 
 	Args:
-		bricks: Brick placement dictionaries.
+		bricks: Brick placements.
 		output_path: Output path.
 		color: LDraw color index.
 		title: Model title.
 	"""
-	lines = []
-	lines.append(f"0 FILE {os.path.basename(output_path)}")
-	lines.append(f"0 Name: {title}")
-	lines.append("0 Author: hilbert-curve-brick")
-	lines.append("0 !LDRAW_ORG Unofficial_Model")
-	lines.append("0 !LICENSE Redistributable under CC BY-SA 4.0")
-
-	for brick in bricks:
-		line = _format_brick_line(brick, color)
-		lines.append(line)
+	header = (
+		f"0 FILE {os.path.basename(output_path)}\n"
+		f"0 Name: {title}\n"
+		"0 Author: hilbert-curve-brick\n"
+		"0 !LDRAW_ORG Unofficial_Model\n"
+		"0 !LICENSE Redistributable under CC BY-SA 4.0\n"
+	)
+	buffer = bytearray(header.encode("ascii"))
+
+	# Lines are formatted straight to bytes; the per-file fields are encoded once.
+	color_b = str(color).encode("ascii")
+	part_files = [part["id"].encode("ascii") for part in PARTS]
+	rot_strs = [ROT_STRS[rot].encode("ascii") for rot in ROTS]
+	line_template = b"1 %b %d %d %d %b %b\n"
+	columns = (bricks.part_ids, bricks.xs, bricks.ys, bricks.zs, bricks.rot_ids)
+	for part_id, x_ldu, y_ldu, z_ldu, rot_id in zip(*(column.tolist() for column in columns)):
+		line_fields = (color_b, x_ldu, y_ldu, z_ldu, rot_strs[rot_id], part_files[part_id])
+		buffer += line_template % line_fields
 
 	output_dir = os.path.dirname(output_path)
 	if output_dir:
 		os.makedirs(output_dir, exist_ok=True)
 
-	with open(output_path, "w", encoding="ascii") as handle:
-		handle.write("\n".join(lines))
-		handle.write("\n")
+	with open(output_path, "wb", buffering=0) as handle:
+		# os.write may stop short, so keep writing the remainder.
+		view = memoryview(buffer)
+		while view:
+			written = os.write(handle.fileno(), view)
+			view = view[written:]
 
 
 #============================================
-def _tile_layer(layer_occ: numpy.ndarray, layer_covered: numpy.ndarray, y_index: int) -> list:
+def _vertical_brick_starts(occupied: numpy.ndarray) -> numpy.ndarray:
 	"""
-	Greedily tile a layer with 2x6, 2x4, and 2x2 bricks.
+	Find the bottom cells of greedy 2x2x3 bricks with array stencils.
+
+	Only vertical bricks touch a column before layer tiling, so each
+	(x, z) column is independent: the greedy scan stacks bricks from the
+	bottom of every occupied run, so a cell starts a brick when the three
+	cells from it up are occupied and its height in the run is a multiple of 3.
 
 	Args:
-		layer_occ: Occupancy for this layer.
-		layer_covered: Coverage mask for this layer.
-		y_index: Layer index.
+		occupied: Boolean occupancy volume.
 
 	Returns:
-		list: Brick placement dictionaries.
+		numpy.ndarray: Boolean volume marking brick bottom cells.
 	"""
-	x_size, z_size = layer_occ.shape
-	bricks = []
-	for z_index in range(z_size):
-		for x_index in range(x_size):
-			if not layer_occ[x_index, z_index]:
-				continue
-			if layer_covered[x_index, z_index]:
-				continue
-
-			if _can_place(layer_occ, layer_covered, x_index, z_index, 3, 1):
-				bricks.append(_make_brick(PART_2X6, x_index, y_index, z_index, ROT_IDENTITY))
-				_mark(layer_covered, x_index, z_index, 3, 1)
-				continue
-			if _can_place(layer_occ, layer_covered, x_index, z_index, 1, 3):
-				bricks.append(_make_brick(PART_2X6, x_index, y_index, z_index, ROT_Y_90, 1, 3))
-				_mark(layer_covered, x_index, z_index, 1, 3)
-				continue
-			if _can_place(layer_occ, layer_covered, x_index, z_index, 2, 1):
-				bricks.append(_make_brick(PART_2X4, x_index, y_index, z_index, ROT_IDENTITY))
-				_mark(layer_covered, x_index, z_index, 2, 1)
-				continue
-			if _can_place(layer_occ, layer_covered, x_index, z_index, 1, 2):
-				bricks.append(_make_brick(PART_2X4, x_index, y_index, z_index, ROT_Y_90, 1, 2))
-				_mark(layer_covered, x_index, z_index, 1, 2)
-				continue
-			bricks.append(_make_brick(PART_2X2, x_index, y_index, z_index, ROT_IDENTITY))
-			layer_covered[x_index, z_index] = True
-
-	return bricks
+	y_size = occupied.shape[1]
+	starts = numpy.zeros(occupied.shape, dtype=numpy.bool_)
+	if y_size < 3:
+		return starts
+	# Three stacked occupied cells, as one AND of shifted slices.
+	triple_occ = occupied[:, :-2, :] & occupied[:, 1:-1, :] & occupied[:, 2:, :]
+	# Height of each cell within its occupied run: distance to the last empty cell below.
+	y_range = numpy.arange(y_size).reshape(1, y_size, 1)
+	last_empty = numpy.where(occupied, -1, y_range)
+	numpy.maximum.accumulate(last_empty, axis=1, out=last_empty)
+	run_height = y_range - last_empty - 1
+	starts[:, :-2, :] = triple_occ & (run_height[:, :-2, :] % 3 == 0)
+	return starts
 
 
 #============================================
-def _can_place(
-		layer_occ: numpy.ndarray,
-		layer_covered: numpy.ndarray,
-		start_x: int,
-		start_z: int,
-		size_x: int,
-		size_z: int
-	) -> bool:
+def _tile_layer(layer_occ: numpy.ndarray, layer_covered: numpy.ndarray) -> numpy.ndarray:
 	"""
-	Check whether a brick fits on a layer.
+	Greedily tile a layer with 2x6, 2x4, and 2x2 bricks.
 
 	Args:
 		layer_occ: Occupancy for this layer.
 		layer_covered: Coverage mask for this layer.
-		start_x: X cell index.
-		start_z: Z cell index.
-		size_x: Size in X cells.
-		size_z: Size in Z cells.
 
 	Returns:
-		bool: True if the brick can be placed.
+		numpy.ndarray: (N, 4) int32 rows of (x, z, size_x, size_z) in placement order.
 	"""
 	x_size, z_size = layer_occ.shape
-	if start_x + size_x > x_size:
-		return False
-	if start_z + size_z > z_size:
-		return False
-	for dz in range(size_z):
-		for dx in range(size_x):
-			x_index = start_x + dx
-			z_index = start_z + dz
-			if not layer_occ[x_index, z_index]:
-				return False
-			if layer_covered[x_index, z_index]:
-				return False
-	return True
+	word_count = (x_size + 63) // 64
+	# One little-endian bitboard row per z, bit x set when the cell is free.
+	layer_free = numpy.zeros((z_size, word_count * 64), dtype=bool)
+	layer_free[:, :x_size] = (layer_occ & ~layer_covered).T
+	free_rows = numpy.packbits(layer_free, axis=1, bitorder="little").view("<u8")
+	free_rows = free_rows.astype(numpy.uint64, copy=False)
+	# Every placed tile covers at least one cell, so x*z rows is an upper bound.
+	out = numpy.empty((x_size * z_size, 4), dtype=numpy.int32)
+	count = _tile_layer_numba(free_rows, x_size, out)
+	tiles = out[:count]
+	return tiles
 
 
 #============================================
-def _mark(
-		layer_covered: numpy.ndarray,
-		start_x: int,
-		start_z: int,
-		size_x: int,
-		size_z: int
-	) -> None:
+@numba.njit(cache=True, boundscheck=False)
+def _tile_layer_numba(free_rows: numpy.ndarray, x_size: int, out: numpy.ndarray) -> int:
 	"""
-	Mark a brick footprint as covered.
+	Greedy layer tiling over uint64 bitboard rows.
+
+	The next candidate cell in a row comes from a trailing-zero count of the
+	free and uncovered bits, so empty and covered runs are skipped a word at a
+	time. The free runs from the cell in +X (one masked word read) and +Z
+	(at most two bit tests), capped at 3, pick the brick from TILE_CHOICE
+	without trying each footprint.
 
 	Args:
-		layer_covered: Coverage mask for this layer.
-		start_x: X cell index.
-		start_z: Z cell index.
-		size_x: Size in X cells.
-		size_z: Size in Z cells.
+		free_rows: (z, words) uint64 bitboard of cells free at layer start.
+		x_size: Layer width in cells.
+		out: (N, 4) int32 buffer receiving (x, z, size_x, size_z) rows.
+
+	Returns:
+		int: Number of rows written to out.
 	"""
-	for dz in range(size_z):
-		for dx in range(size_x):
-			layer_covered[start_x + dx, start_z + dz] = True
+	z_size, word_count = free_rows.shape
+	cover_rows = numpy.zeros_like(free_rows)
+	one = numpy.uint64(1)
+	count = 0
+	for z_index in range(z_size):
+		for word in range(word_count):
+			candidates = free_rows[z_index, word] & ~cover_rows[z_index, word]
+			while candidates:
+				bit = hilbert_curve_brick.bitops.ctz64(candidates)
+				x_index = word * 64 + bit
+				# Padding bits past x_size are never free, so runs stop at the edge.
+				run_bits = _row_bits(free_rows, z_index, x_index, 3)
+				run_bits &= ~_row_bits(cover_rows, z_index, x_index, 3)
+				# Bit 3 caps the run at 3 cells.
+				run_x = hilbert_curve_brick.bitops.ctz64(~run_bits | numpy.uint64(8))
+				run_z = 1
+				while run_z < 3 and z_index + run_z < z_size:
+					below = _row_bits(free_rows, z_index + run_z, x_index, 1)
+					below &= ~_row_bits(cover_rows, z_index + run_z, x_index, 1)
+					if not below:
+						break
+					run_z += 1
+				size_index = TILE_CHOICE[run_x, run_z]
+				size_x = TILE_SIZES[size_index, 0]
+				size_z = TILE_SIZES[size_index, 1]
+				for dz in range(size_z):
+					_set_row_bits(cover_rows, z_index + dz, x_index, size_x)
+				out[count, 0] = x_index
+				out[count, 1] = z_index
+				out[count, 2] = size_x
+				out[count, 3] = size_z
+				count += 1
+				# Drop this bit and everything below it; bit 63 wraps the mask to all ones.
+				done_mask = (numpy.uint64(2) << numpy.uint64(bit)) - one
+				candidates = free_rows[z_index, word] & ~cover_rows[z_index, word] & ~done_mask
+	return count
 
 
 #============================================
-def _make_brick(
-		part: dict,
-		x_index: int,
-		y_index: int,
-		z_index: int,
-		rot: tuple,
-		size_x: int = None,
-		size_z: int = None
-	) -> dict:
+@numba.njit(cache=True, boundscheck=False)
+def _row_bits(rows: numpy.ndarray, z_index: int, x_index: int, width: int) -> numpy.uint64:
 	"""
-	Create a brick placement record.
+	Read width bits starting at x_index from one bitboard row.
 
 	Args:
-		part: Part definition dictionary.
-		x_index: X cell index.
-		y_index: Y cell index.
-		z_index: Z cell index.
-		rot: Rotation matrix.
-		size_x: Override size in X cells.
-		size_z: Override size in Z cells.
+		rows: (z, words) uint64 bitboard.
+		z_index: Row index.
+		x_index: First bit.
+		width: Bit count, at most 64.
 
 	Returns:
-		dict: Brick placement.
+		numpy.uint64: The bits, shifted down to bit 0.
 	"""
-	if size_x is None:
-		size_x = part["size_x"]
-	if size_z is None:
-		size_z = part["size_z"]
-
-	width_x = size_x * CELL_LDU
-	width_z = size_z * CELL_LDU
-	height = part["height"] * BRICK_HEIGHT_LDU
-
-	x_ldu = x_index * CELL_LDU + (width_x // 2)
-	y_ldu = y_index * BRICK_HEIGHT_LDU + (height // 2)
-	z_ldu = z_index * CELL_LDU + (width_z // 2)
-
-	brick = {
-		"part": part["id"],
-		"x": x_ldu,
-		"y": y_ldu,
-		"z": z_ldu,
-		"rot": rot,
-	}
-	return brick
+	word = x_index >> 6
+	offset = x_index & 63
+	shift = numpy.uint64(offset)
+	bits = rows[z_index, word] >> shift
+	if offset + width > 64 and word + 1 < rows.shape[1]:
+		bits |= rows[z_index, word + 1] << (numpy.uint64(64) - shift)
+	one = numpy.uint64(1)
+	return bits & ((one << numpy.uint64(width)) - one)
 
 
 #============================================
-def _format_brick_line(brick: dict, color: int) -> str:
+@numba.njit(cache=True, boundscheck=False)
+def _set_row_bits(rows: numpy.ndarray, z_index: int, x_index: int, width: int) -> None:
 	"""
-	Format a brick placement as an LDraw line.
+	Set width bits starting at x_index in one bitboard row.
 
 	Args:
-		brick: Brick placement dictionary.
-		color: LDraw color index.
-
-	Returns:
-		str: LDraw line string.
+		rows: (z, words) uint64 bitboard, updated in place.
+		z_index: Row index.
+		x_index: First bit.
+		width: Bit count, at most 64.
 	"""
-	rot = brick["rot"]
-	parts = [
-		"1",
-		str(color),
-		str(brick["x"]),
-		str(brick["y"]),
-		str(brick["z"]),
-		str(rot[0]),
-		str(rot[1]),
-		str(rot[2]),
-		str(rot[3]),
-		str(rot[4]),
-		str(rot[5]),
-		str(rot[6]),
-		str(rot[7]),
-		str(rot[8]),
-		brick["part"],
-	]
-	line = " ".join(parts)
-	return line
+	word = x_index >> 6
+	offset = x_index & 63
+	shift = numpy.uint64(offset)
+	one = numpy.uint64(1)
+	mask = (one << numpy.uint64(width)) - one
+	rows[z_index, word] |= mask << shift
+	if offset + width > 64 and word + 1 < rows.shape[1]:
+		rows[z_index, word + 1] |= mask >> (numpy.uint64(64) - shift)
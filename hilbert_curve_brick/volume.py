@@ -4,8 +4,11 @@ Volume generation and PNG helpers.
 """
 
 # Standard Library
-import math
 import os
+import math
+import tempfile
+import dataclasses
+import concurrent.futures
 
 # PIP3 modules
 import numpy
@@ -15,6 +18,78 @@ import scipy.ndimage
 import hilbert_curve_brick.curve
 import leginon.imagefile
 
+# uint8 voxel values: the curve is full scale, grid planes mid gray.
+PATH_VALUE = 255
+GRID_VALUE = 128
+
+AXIS_INDEX = {'x': 0, 'y': 1, 'z': 2}
+# Bump when the cached path layout changes so stale files are never read.
+PATH_CACHE_VERSION = 1
+
+
+#============================================
+@dataclasses.dataclass
+class HilbertPath:
+	"""
+	Sparse voxel coordinates of a Hilbert path.
+
+	Attributes:
+		xs: int32 X voxel indices of the path, endpoints then connectors.
+		ys: int32 Y voxel indices.
+		zs: int32 Z voxel indices.
+		size: Edge length of the unscaled cubic volume.
+	"""
+	xs: numpy.ndarray
+	ys: numpy.ndarray
+	zs: numpy.ndarray
+	size: int
+
+	#============================================
+	def rasterize(self, scale: int = 1, scale_y: int = 1) -> numpy.ndarray:
+		"""
+		Materialize the path as a dense scaled volume.
+
+		The path is written once into the unscaled cube, which is then
+		expanded with scale_volume.
+
+		Args:
+			scale: Integer scale factor for X and Z.
+			scale_y: Integer scale factor for Y.
+
+		Returns:
+			numpy.ndarray: 3D uint8 volume with the curve set to PATH_VALUE.
+		"""
+		volume = numpy.zeros((self.size, self.size, self.size), dtype=numpy.uint8)
+		volume[self.xs, self.ys, self.zs] = PATH_VALUE
+		if scale != 1 or scale_y != 1:
+			volume = scale_volume(volume, scale, scale_y)
+		return volume
+
+
+#============================================
+def build_hilbert_path(dimension: int) -> HilbertPath:
+	"""
+	Build the sparse voxel path of a 3D Hilbert curve.
+
+	The path only depends on dimension, so it is cached on disk and
+	later calls read the cached coordinates through a memory map. A
+	cache file with the wrong dtype or shape is recomputed and replaced.
+
+	Args:
+		dimension: Hilbert dimension per axis.
+
+	Returns:
+		HilbertPath: Path voxels inside a cube with a 1-voxel border.
+	"""
+	size = dimension * 2 + 1
+	cache_path = _path_cache_path(dimension)
+	coords = _load_cached_path(cache_path, dimension)
+	if coords is None:
+		coords = _compute_path_coords(dimension)
+		_save_atomic(cache_path, coords)
+	path = HilbertPath(xs=coords[0], ys=coords[1], zs=coords[2], size=size)
+	return path
+
 
 #============================================
 def build_hilbert_volume(dimension: int) -> numpy.ndarray:
@@ -27,22 +102,111 @@ def build_hilbert_volume(dimension: int) -> numpy.ndarray:
 	Returns:
 		numpy.ndarray: 3D volume with the curve.
 	"""
-	# Allocate a cubic volume with a 1-voxel border.
-	max_dim = dimension * 2 + 1
-	volume = numpy.zeros((max_dim, max_dim, max_dim), dtype=numpy.float32)
-	last_coord = None
-	for index in range(dimension ** 3):
-		# Use even coordinates to leave room for connector voxels.
-		coord = 2 * numpy.array(hilbert_curve_brick.curve.int_to_hilbert(index, 3), dtype=int)
-		volume[coord[0] + 1, coord[1] + 1, coord[2] + 1] = 1.0
-		if last_coord is not None:
-			# Fill the midpoint between steps to keep the curve connected.
-			mid = (coord + last_coord) // 2
-			volume[mid[0] + 1, mid[1] + 1, mid[2] + 1] = 1.0
-		last_coord = coord
+	path = build_hilbert_path(dimension)
+	volume = path.rasterize()
 	return volume
 
 
+#============================================
+def _path_cache_path(dimension: int) -> str:
+	"""
+	Return the cache file path for a base path.
+
+	Args:
+		dimension: Hilbert dimension per axis.
+
+	Returns:
+		str: Path under $XDG_CACHE_HOME/hilbert-curve-brick.
+	"""
+	cache_home = os.environ.get("XDG_CACHE_HOME", os.path.join("~", ".cache"))
+	cache_dir = os.path.join(os.path.expanduser(cache_home), "hilbert-curve-brick")
+	cache_path = os.path.join(cache_dir, f"path_v{PATH_CACHE_VERSION}_{dimension}.npy")
+	return cache_path
+
+
+#============================================
+def _load_cached_path(cache_path: str, dimension: int) -> numpy.ndarray:
+	"""
+	Memory-map a cached path if it exists and has the expected layout.
+
+	Args:
+		cache_path: Cache file path.
+		dimension: Hilbert dimension per axis.
+
+	Returns:
+		numpy.ndarray: (3, N) int32 coordinates, or None when missing or invalid.
+	"""
+	if not os.path.isfile(cache_path):
+		return None
+	try:
+		coords = numpy.load(cache_path, mmap_mode='r')
+	except (OSError, ValueError):
+		return None
+	# Endpoints plus the connectors between consecutive endpoints.
+	expected_shape = (3, 2 * dimension ** 3 - 1)
+	if coords.dtype != numpy.int32 or coords.shape != expected_shape:
+		return None
+	return coords
+
+
+#============================================
+def _save_atomic(output_path: str, array: numpy.ndarray) -> None:
+	"""
+	Save an array so readers never see a partially written file.
+
+	The save is best effort: the cache only saves time, so an unwritable
+	cache directory leaves the run unaffected.
+
+	Args:
+		output_path: Destination .npy path.
+		array: Array to save.
+	"""
+	output_dir = os.path.dirname(output_path)
+	try:
+		os.makedirs(output_dir, exist_ok=True)
+	except OSError:
+		return
+	# Write beside the target, then rename over it in one step.
+	try:
+		handle = tempfile.NamedTemporaryFile(dir=output_dir, suffix=".npy", delete=False)
+	except OSError:
+		return
+	saved = True
+	with handle:
+		try:
+			numpy.save(handle, array)
+		except OSError:
+			saved = False
+	if saved:
+		try:
+			os.replace(handle.name, output_path)
+		except OSError:
+			saved = False
+	if not saved:
+		os.remove(handle.name)
+
+
+#============================================
+def _compute_path_coords(dimension: int) -> numpy.ndarray:
+	"""
+	Compute the voxel coordinates of the Hilbert path.
+
+	Args:
+		dimension: Hilbert dimension per axis.
+
+	Returns:
+		numpy.ndarray: (3, N) int32 voxel coordinates, endpoints then connectors.
+	"""
+	# Decode every Hilbert index in one compiled pass instead of one call per voxel.
+	coords = hilbert_curve_brick.curve.int_to_hilbert_batch(dimension ** 3, 3)
+	# Map curve coordinates to odd voxels, leaving even voxels for connectors.
+	ends = 2 * coords.T + 1
+	# Connector voxels sit halfway between consecutive endpoints.
+	mids = (ends[:, :-1] + ends[:, 1:]) >> 1
+	path_coords = numpy.concatenate((ends, mids), axis=1)
+	return path_coords
+
+
 #============================================
 def compute_scale(dimension: int, target_size: int) -> int:
 	"""
@@ -69,6 +233,9 @@ def scale_volume(volume: numpy.ndarray, scale: int, scale_y: int) -> numpy.ndarr
 	"""
 	Scale the volume with nearest-neighbor interpolation.
 
+	Integer factors repeat each voxel into a uniform block; other factors
+	fall back to scipy.ndimage.zoom.
+
 	Args:
 		volume: Input volume.
 		scale: Scale factor for X and Z.
@@ -78,7 +245,16 @@ def scale_volume(volume: numpy.ndarray, scale: int, scale_y: int) -> numpy.ndarr
 		numpy.ndarray: Scaled volume.
 	"""
 	scales = (scale, scale_y, scale)
-	scaled = scipy.ndimage.zoom(volume, scales, order=0)
+	if not all(float(factor).is_integer() for factor in scales):
+		scaled = scipy.ndimage.zoom(volume, scales, order=0)
+		return scaled
+	scale = int(scale)
+	scale_y = int(scale_y)
+	# Repeat the innermost axis first so each pass copies contiguous runs
+	# while the array is still small.
+	scaled = numpy.repeat(volume, scale, axis=2)
+	scaled = numpy.repeat(scaled, scale_y, axis=1)
+	scaled = numpy.repeat(scaled, scale, axis=0)
 	return scaled
 
 
@@ -96,42 +272,33 @@ def apply_grid_overlay(volume: numpy.ndarray, step: int) -> numpy.ndarray:
 	"""
 	max_index = min(volume.shape[0], volume.shape[2])
 	grid_count = max_index // step
-	for grid_index in range(1, grid_count):
-		volume[grid_index * step, :, :] = 0.5
-		volume[:, :, grid_index * step] = 0.5
+	# Interior grid planes only; skip index 0 and the far edge. A strided
+	# slice writes through a view instead of gathering an index array.
+	grid_planes = slice(step, grid_count * step, step)
+	volume[grid_planes, :, :] = GRID_VALUE
+	volume[:, :, grid_planes] = GRID_VALUE
 	return volume
 
 
 #============================================
-def iter_slices(volume: numpy.ndarray, axis: str, start: int, end: int) -> tuple:
+def _slice_range(max_slices: int, start: int, end: int) -> tuple:
 	"""
-	Iterate slices along a specific axis.
+	Resolve a slice range, where a negative end counts back from the last slice.
 
 	Args:
-		volume: Input volume.
-		axis: Axis label ('x', 'y', 'z').
+		max_slices: Number of slices along the axis.
 		start: First slice index.
-		end: End slice index (exclusive).
+		end: End slice index (exclusive); -1 means through the last slice.
 
 	Returns:
-		tuple: (slice_index, slice_array).
+		tuple: (start_index, end_index) clipped to the axis.
 	"""
-	axis_map = {'x': 0, 'y': 1, 'z': 2}
-	axis_index = axis_map[axis]
-	max_slices = volume.shape[axis_index]
 	start_index = max(0, start)
 	end_index = end
 	if end_index < 0:
 		end_index = max_slices + end_index + 1
 	end_index = min(end_index, max_slices)
-	for slice_index in range(start_index, end_index):
-		if axis_index == 0:
-			slice_array = volume[slice_index, :, :]
-		elif axis_index == 1:
-			slice_array = volume[:, slice_index, :]
-		else:
-			slice_array = volume[:, :, slice_index]
-		yield slice_index, slice_array
+	return start_index, end_index
 
 
 #============================================
@@ -143,11 +310,15 @@ def write_slices(
 		invert: bool,
 		normalize: bool,
 		slice_start: int,
-		slice_end: int
+		slice_end: int,
+		compress_level: int = 1
 	) -> None:
 	"""
 	Write PNG slices to disk.
 
+	Slices are quantized and encoded on a thread pool; zlib releases the
+	GIL while compressing, so the encodes run in parallel.
+
 	Args:
 		volume: Input volume.
 		axis: Axis label.
@@ -157,12 +328,44 @@ def write_slices(
 		normalize: Whether to normalize slices.
 		slice_start: First slice index.
 		slice_end: End slice index (exclusive).
+		compress_level: PNG zlib level, 0-9; 1 is much faster than 6 for slightly larger files.
 	"""
 	os.makedirs(output_dir, exist_ok=True)
-	for slice_index, slice_array in iter_slices(volume, axis, slice_start, slice_end):
-		output_array = slice_array
-		if invert:
-			output_array = 1.0 - output_array
-		filename = f"{prefix}-{slice_index:03d}.png"
-		output_path = os.path.join(output_dir, filename)
-		leginon.imagefile.arrayToPng(output_array, output_path, normalize=normalize)
+	axis_index = AXIS_INDEX[axis]
+	start_index, end_index = _slice_range(volume.shape[axis_index], slice_start, slice_end)
+	# One transposed copy of the requested range makes every slice a contiguous 2D plane.
+	slice_view = numpy.moveaxis(volume, axis_index, 0)
+	slab = numpy.ascontiguousarray(slice_view[start_index:end_index])
+	with concurrent.futures.ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+		futures = []
+		for slab_index, slice_array in enumerate(slab):
+			slice_index = start_index + slab_index
+			filename = f"{prefix}-{slice_index:03d}.png"
+			output_path = os.path.join(output_dir, filename)
+			future = executor.submit(
+				leginon.imagefile.arrayToPng,
+				slice_array,
+				output_path,
+				normalize=normalize,
+				compress_level=compress_level,
+				invert=invert,
+			)
+			futures.append(future)
+		# Surface the first encode error as soon as it happens.
+		for future in concurrent.futures.as_completed(futures):
+			future.result()
+
+
+#============================================
+def write_volume_npz(volume: numpy.ndarray, output_path: str) -> None:
+	"""
+	Write a volume as a single compressed NumPy archive.
+
+	Args:
+		volume: Input volume.
+		output_path: Output .npz path; load it back with numpy.load(path)['volume'].
+	"""
+	output_dir = os.path.dirname(output_path)
+	if output_dir:
+		os.makedirs(output_dir, exist_ok=True)
+	numpy.savez_compressed(output_path, volume=volume)
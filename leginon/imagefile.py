@@ -6,38 +6,99 @@ Minimal image helpers for writing PNG slices.
 # Standard Library
 
 # PIP3 modules
+import numba
 import numpy
 import PIL.Image
 
 
 #============================================
-def _normalize_array(numer: numpy.ndarray, normalize: bool) -> numpy.ndarray:
+def _normalize_array(numer: numpy.ndarray, normalize: bool, invert: bool = False) -> numpy.ndarray:
 	"""
 	Normalize or scale an array to 0-255.
 
 	Args:
 		numer: Input array.
 		normalize: Whether to normalize the data range.
+		invert: Whether to invert the 0-255 output.
 
 	Returns:
 		numpy.ndarray: uint8 array in 0-255 range.
 	"""
+	# Already quantized data passes straight through.
+	if not normalize and numer.dtype == numpy.uint8:
+		if invert:
+			inverted = 255 - numer
+			return inverted
+		return numer
+	flat = numpy.ascontiguousarray(numer).reshape(-1)
+	# Do the arithmetic in the input float type, as the array expressions did,
+	# so values on exact 0-255 steps truncate the same way.
+	work = numpy.float64
+	if numer.dtype in (numpy.float32, numpy.float64):
+		work = numer.dtype.type
+	top = work(1.0)
+	low = work(0.0)
+	span = work(1.0)
 	if normalize:
-		min_value = float(numpy.min(numer))
-		max_value = float(numpy.max(numer))
-		if max_value == min_value:
-			scaled = numpy.zeros(numer.shape, dtype=numpy.float32)
-		else:
-			scaled = (numer - min_value) / (max_value - min_value)
-		scaled = scaled * 255.0
-	else:
-		scaled = numer * 255.0
-
-	clipped = numpy.clip(scaled, 0, 255)
-	result = clipped.astype(numpy.uint8)
+		# numpy's SIMD reductions beat a compiled scalar loop here.
+		low = work(numpy.min(flat))
+		high = work(numpy.max(flat))
+		if invert:
+			# Inverting is monotonic, so the inverted range comes from the flipped ends.
+			low, high = top - high, top - low
+		span = work(float(high) - float(low))
+	result = numpy.zeros(flat.size, dtype=numpy.uint8)
+	# A flat image normalizes to black.
+	if span != 0.0:
+		_quantize_kernel(flat, invert, top, low, span, work(255.0), result)
+	result = result.reshape(numer.shape)
 	return result
 
 
+#============================================
+@numba.njit(cache=True, nogil=True)
+def _quantize_kernel(
+		flat: numpy.ndarray,
+		invert: bool,
+		top: float,
+		low: float,
+		span: float,
+		full: float,
+		out: numpy.ndarray
+	) -> None:
+	"""
+	Invert, scale, clip, and quantize a flat array to uint8 in one write pass.
+
+	Replaces the separate invert, subtract, divide, multiply, clip, and
+	astype passes, each of which allocated a full temporary. The scalars
+	share one float type so the arithmetic rounds like those passes did.
+	The loop is serial because callers such as write_slices already run one
+	image per thread; nogil releases the GIL so those threads quantize
+	concurrently.
+
+	Args:
+		flat: 1D input array.
+		invert: Whether to map each value x to top - x first.
+		top: Value inverted around, 1.0.
+		low: Value mapped to 0.
+		span: Input range mapped to 0-255.
+		full: Output scale, 255.0.
+		out: 1D uint8 output, same size as flat.
+	"""
+	for index in range(flat.size):
+		# Multiplying by 1.0 lifts integer input into the float type exactly.
+		value = flat[index] * top
+		if invert:
+			value = top - value
+		scaled = (value - low) / span * full
+		if scaled <= 0.0:
+			out[index] = 0
+		elif scaled >= 255.0:
+			out[index] = 255
+		else:
+			out[index] = numpy.uint8(scaled)
+
+
 #============================================
 def _array_to_image(numer: numpy.ndarray) -> "PIL.Image.Image":
 	"""
@@ -49,14 +110,14 @@ def _array_to_image(numer: numpy.ndarray) -> "PIL.Image.Image":
 	Returns:
 		PIL.Image.Image: PIL image.
 	"""
+	# fromarray reads a contiguous uint8 buffer through the array interface,
+	# skipping the tobytes copy; grayscale images share the array memory.
 	shape_length = len(numer.shape)
 	if shape_length == 2:
-		height, width = numer.shape
-		image = PIL.Image.frombytes("L", (width, height), numer.tobytes())
+		image = PIL.Image.fromarray(numpy.ascontiguousarray(numer, dtype=numpy.uint8))
 		return image
 	if shape_length == 3 and numer.shape[2] == 3:
-		height, width, _ = numer.shape
-		image = PIL.Image.frombytes("RGB", (width, height), numer.tobytes())
+		image = PIL.Image.fromarray(numpy.ascontiguousarray(numer, dtype=numpy.uint8))
 		return image
 	raise ValueError("Unsupported image array shape")
 
@@ -66,7 +127,9 @@ def arrayToPng(
 		numer: numpy.ndarray,
 		filename: str,
 		normalize: bool = True,
-		msg: bool = True
+		msg: bool = True,
+		compress_level: int = 6,
+		invert: bool = False
 	) -> None:
 	"""
 	Write a numpy array to a PNG file.
@@ -76,12 +139,14 @@ def arrayToPng(
 		filename: Output path.
 		normalize: Normalize array before saving.
 		msg: Print a status line.
+		compress_level: zlib compression level, 0-9.
+		invert: Invert the 0-255 output.
 	"""
-	normalized = _normalize_array(numer, normalize)
+	normalized = _normalize_array(numer, normalize, invert)
 	image = _array_to_image(normalized)
 	if msg:
 		print(f"writing PNG: {filename}")
-	image.save(filename, "PNG")
+	image.save(filename, "PNG", compress_level=compress_level)
 
 
 #============================================
@@ -89,7 +154,9 @@ def array_to_png(
 		numer: numpy.ndarray,
 		filename: str,
 		normalize: bool = True,
-		msg: bool = True
+		msg: bool = True,
+		compress_level: int = 6,
+		invert: bool = False
 	) -> None:
 	"""
 	Snake-case wrapper for arrayToPng.
@@ -99,5 +166,14 @@ def array_to_png(
 		filename: Output path.
 		normalize: Normalize array before saving.
 		msg: Print a status line.
+		compress_level: zlib compression level, 0-9.
+		invert: Invert the 0-255 output.
 	"""
-	arrayToPng(numer, filename, normalize=normalize, msg=msg)
+	arrayToPng(
+		numer,
+		filename,
+		normalize=normalize,
+		msg=msg,
+		compress_level=compress_level,
+		invert=invert,
+	)
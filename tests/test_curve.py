@@ -0,0 +1,90 @@
+# PIP3 modules
+import numpy
+import pytest
+
+# local repo modules
+import hilbert_curve_brick.curve
+
+
+# First 8 cells of the 3D curve, fixed independently of the lookup tables.
+ORDER1_3D = ((0, 0, 0), (1, 0, 0), (1, 0, 1), (0, 0, 1), (0, 1, 1), (1, 1, 1), (1, 1, 0), (0, 1, 0))
+
+
+#============================================
+@pytest.mark.parametrize("bit_count", (1, 2, 5, 10, hilbert_curve_brick.curve.MORTON3_MAX_BITS))
+def test_transpose_bits3_matches_transpose_bits(bit_count: int) -> None:
+	"""
+	Morton transpose matches transpose_bits and round-trips through untranspose_bits3.
+	"""
+	rng = numpy.random.default_rng(bit_count)
+	for x_value, y_value, z_value in rng.integers(0, 1 << bit_count, size=(200, 3)).tolist():
+		chunks = hilbert_curve_brick.curve.transpose_bits3(x_value, y_value, z_value, bit_count)
+		expected = hilbert_curve_brick.curve.transpose_bits([x_value, y_value, z_value], bit_count)
+		assert chunks == expected
+		assert hilbert_curve_brick.curve.untranspose_bits3(chunks) == (x_value, y_value, z_value)
+
+
+#============================================
+def _gray_travel_coords(index: int, n_dimensions: int) -> tuple:
+	"""
+	Decode one index with the plain Gray-travel loop, without lookup tables.
+	"""
+	index_chunks = hilbert_curve_brick.curve.unpack_index(index, n_dimensions)
+	chunk_count = len(index_chunks)
+	mask = 2 ** n_dimensions - 1
+	start, end = hilbert_curve_brick.curve.initial_start_end(chunk_count, n_dimensions)
+	coord_chunks = [0] * chunk_count
+	for chunk_index, chunk_value in enumerate(index_chunks):
+		coord_chunks[chunk_index] = hilbert_curve_brick.curve.gray_encode_travel(start, end, mask, chunk_value)
+		start, end = hilbert_curve_brick.curve.child_start_end(start, end, mask, chunk_value)
+	coords = hilbert_curve_brick.curve.pack_coords(coord_chunks, n_dimensions)
+	return coords
+
+
+#============================================
+@pytest.mark.parametrize("n_dimensions", (2, 3, 4))
+def test_int_to_hilbert_batch_matches_gray_travel(n_dimensions: int) -> None:
+	"""
+	Batch and single-index decoders match the table-free Gray-travel loop.
+	"""
+	count = 1 << (3 * n_dimensions)
+	coords = hilbert_curve_brick.curve.int_to_hilbert_batch(count, n_dimensions)
+	assert coords.shape == (count, n_dimensions)
+	assert coords.dtype == numpy.int32
+	for index, row in enumerate(coords.tolist()):
+		expected = _gray_travel_coords(index, n_dimensions)
+		assert tuple(row) == tuple(expected)
+		assert tuple(hilbert_curve_brick.curve.int_to_hilbert(index, n_dimensions)) == tuple(expected)
+
+
+#============================================
+@pytest.mark.parametrize("count", (0, 1, 2, 7, 9, 100))
+def test_int_to_hilbert_batch_partial_counts(count: int) -> None:
+	"""
+	Batch decoding of counts that are not full cubes matches the Gray-travel loop.
+	"""
+	coords = hilbert_curve_brick.curve.int_to_hilbert_batch(count, 3)
+	assert coords.shape == (count, 3)
+	for index, row in enumerate(coords.tolist()):
+		assert tuple(row) == tuple(_gray_travel_coords(index, 3))
+
+
+#============================================
+def test_int_to_hilbert_3d_known_coords() -> None:
+	"""
+	The first 3D cube decodes to the known order-1 coordinates.
+	"""
+	coords = hilbert_curve_brick.curve.int_to_hilbert_batch(8, 3)
+	assert tuple(tuple(row) for row in coords.tolist()) == ORDER1_3D
+	assert tuple(hilbert_curve_brick.curve.int_to_hilbert(index, 3) for index in range(8)) == ORDER1_3D
+
+
+#============================================
+def test_int_to_hilbert_3d_unit_steps() -> None:
+	"""
+	Consecutive 3D cells are unit steps apart and never repeat.
+	"""
+	coords = hilbert_curve_brick.curve.int_to_hilbert_batch(1 << 12, 3).astype(numpy.int64)
+	steps = numpy.abs(numpy.diff(coords, axis=0)).sum(axis=1)
+	assert numpy.all(steps == 1)
+	assert numpy.unique(coords, axis=0).shape[0] == coords.shape[0]
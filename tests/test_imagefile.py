@@ -0,0 +1,81 @@
+# PIP3 modules
+import numpy
+import pytest
+
+# local repo modules
+import leginon.imagefile
+
+
+#============================================
+def _baseline_normalize(numer: numpy.ndarray, normalize: bool, invert: bool) -> numpy.ndarray:
+	"""
+	The original array-expression quantizer, with write_slices' 1.0 - x invert.
+	"""
+	if invert:
+		numer = 1.0 - numer
+	if normalize:
+		min_value = float(numpy.min(numer))
+		max_value = float(numpy.max(numer))
+		if max_value == min_value:
+			scaled = numpy.zeros(numer.shape, dtype=numpy.float32)
+		else:
+			scaled = (numer - min_value) / (max_value - min_value)
+		scaled = scaled * 255.0
+	else:
+		scaled = numer * 255.0
+	result = numpy.clip(scaled, 0, 255).astype(numpy.uint8)
+	return result
+
+
+#============================================
+def _sample_arrays(dtype: type) -> list:
+	"""
+	Random, constant, and exact 0-255 step arrays in the given dtype.
+	"""
+	rng = numpy.random.default_rng(0)
+	arrays = [
+		(numpy.arange(256) / 255.0).reshape(16, 16),
+		rng.random((32, 32)),
+		rng.random((32, 32)) * 10.0 - 3.0,
+		numpy.array(((0.0, 0.5, 1.0), (0.25, 0.75, 1.0 / 3.0))),
+		numpy.full((3, 3), 0.7),
+	]
+	arrays = [array.astype(dtype) for array in arrays]
+	return arrays
+
+
+#============================================
+@pytest.mark.parametrize("dtype", (numpy.float32, numpy.float64))
+@pytest.mark.parametrize("normalize", (False, True))
+@pytest.mark.parametrize("invert", (False, True))
+def test_normalize_array_float_matches_baseline(dtype: type, normalize: bool, invert: bool) -> None:
+	"""
+	Float input quantizes exactly like the original array expressions.
+	"""
+	for array in _sample_arrays(dtype):
+		result = leginon.imagefile._normalize_array(array, normalize, invert)
+		assert result.dtype == numpy.uint8
+		assert numpy.array_equal(result, _baseline_normalize(array, normalize, invert))
+
+
+#============================================
+@pytest.mark.parametrize("invert", (False, True))
+def test_normalize_array_uint8_normalize_matches_baseline(invert: bool) -> None:
+	"""
+	Normalized uint8 input quantizes exactly like the original array expressions.
+	"""
+	rng = numpy.random.default_rng(1)
+	array = rng.integers(10, 200, size=(24, 24)).astype(numpy.uint8)
+	result = leginon.imagefile._normalize_array(array, True, invert)
+	assert numpy.array_equal(result, _baseline_normalize(array, True, invert))
+
+
+#============================================
+def test_normalize_array_uint8_passes_through() -> None:
+	"""
+	Unnormalized uint8 input is already on the 0-255 scale; invert maps x to 255 - x.
+	"""
+	array = numpy.arange(256, dtype=numpy.uint8).reshape(16, 16)
+	assert leginon.imagefile._normalize_array(array, False) is array
+	inverted = leginon.imagefile._normalize_array(array, False, invert=True)
+	assert numpy.array_equal(inverted, 255 - numpy.arange(256).reshape(16, 16))
@@ -0,0 +1,234 @@
+# PIP3 modules
+import numpy
+import pytest
+
+# local repo modules
+import hilbert_curve_brick.ldraw
+
+
+# Layer footprints (part, size_x, size_z, rot) in greedy trial order.
+LAYER_TRIALS = (
+	(hilbert_curve_brick.ldraw.PART_2X6, 3, 1, hilbert_curve_brick.ldraw.ROT_IDENTITY),
+	(hilbert_curve_brick.ldraw.PART_2X6, 1, 3, hilbert_curve_brick.ldraw.ROT_Y_90),
+	(hilbert_curve_brick.ldraw.PART_2X4, 2, 1, hilbert_curve_brick.ldraw.ROT_IDENTITY),
+	(hilbert_curve_brick.ldraw.PART_2X4, 1, 2, hilbert_curve_brick.ldraw.ROT_Y_90),
+	(hilbert_curve_brick.ldraw.PART_2X2, 1, 1, hilbert_curve_brick.ldraw.ROT_IDENTITY),
+)
+
+
+#============================================
+def _reference_brick(part: dict, x_index: int, y_index: int, z_index: int, rot: tuple,
+		size_x: int, size_z: int) -> dict:
+	"""
+	Build one brick placement the way the original list-based code did.
+	"""
+	cell_ldu = hilbert_curve_brick.ldraw.CELL_LDU
+	height = part["height"] * hilbert_curve_brick.ldraw.BRICK_HEIGHT_LDU
+	brick = {
+		"part": part["id"],
+		"x": x_index * cell_ldu + (size_x * cell_ldu) // 2,
+		"y": y_index * hilbert_curve_brick.ldraw.BRICK_HEIGHT_LDU + height // 2,
+		"z": z_index * cell_ldu + (size_z * cell_ldu) // 2,
+		"rot": rot,
+	}
+	return brick
+
+
+#============================================
+def _fits(occupied: numpy.ndarray, covered: numpy.ndarray, x_index: int, y_index: int,
+		z_index: int, size_x: int, size_z: int) -> bool:
+	"""
+	Check a layer footprint cell by cell.
+	"""
+	x_size, _, z_size = occupied.shape
+	if x_index + size_x > x_size or z_index + size_z > z_size:
+		return False
+	for dz in range(size_z):
+		for dx in range(size_x):
+			cell = (x_index + dx, y_index, z_index + dz)
+			if not occupied[cell] or covered[cell]:
+				return False
+	return True
+
+
+#============================================
+def _reference_bricks(volume: numpy.ndarray, threshold: int) -> list:
+	"""
+	Plain cell-by-cell greedy tiler matching the original implementation.
+	"""
+	occupied = volume >= threshold
+	covered = numpy.zeros(occupied.shape, dtype=numpy.bool_)
+	x_size, y_size, z_size = occupied.shape
+	bricks = []
+	# Vertical 2x2x3 bricks first, scanning y, z, x.
+	for y_index in range(y_size - 2):
+		for z_index in range(z_size):
+			for x_index in range(x_size):
+				column = [(x_index, y_index + dy, z_index) for dy in range(3)]
+				if all(occupied[cell] and not covered[cell] for cell in column):
+					bricks.append(_reference_brick(
+						hilbert_curve_brick.ldraw.PART_2X2X3, x_index, y_index, z_index,
+						hilbert_curve_brick.ldraw.ROT_IDENTITY, 1, 1,
+					))
+					for cell in column:
+						covered[cell] = True
+	# Then each layer, scanning z, x and trying footprints largest first.
+	for y_index in range(y_size):
+		for z_index in range(z_size):
+			for x_index in range(x_size):
+				if not occupied[x_index, y_index, z_index] or covered[x_index, y_index, z_index]:
+					continue
+				for part, size_x, size_z, rot in LAYER_TRIALS:
+					if _fits(occupied, covered, x_index, y_index, z_index, size_x, size_z):
+						break
+				bricks.append(_reference_brick(part, x_index, y_index, z_index, rot, size_x, size_z))
+				covered[x_index:x_index + size_x, y_index, z_index:z_index + size_z] = True
+	return bricks
+
+
+#============================================
+def _random_volume(seed: int, shape: tuple, density: float) -> numpy.ndarray:
+	"""
+	Build a seeded random uint8 volume with values 0 or 255.
+	"""
+	rng = numpy.random.default_rng(seed)
+	volume = numpy.where(rng.random(shape) < density, 255, 0).astype(numpy.uint8)
+	return volume
+
+
+#============================================
+@pytest.mark.parametrize("seed", range(20))
+def test_volume_to_bricks_matches_reference_small(seed: int) -> None:
+	"""
+	Small random volumes tile the same as the reference greedy tiler.
+	"""
+	rng = numpy.random.default_rng(1000 + seed)
+	shape = tuple(int(size) for size in rng.integers(1, 9, size=3))
+	density = float(rng.choice((0.3, 0.6, 0.9)))
+	volume = _random_volume(seed, shape, density)
+	bricks = hilbert_curve_brick.ldraw.volume_to_bricks(volume, 128)
+	assert bricks.to_list() == _reference_bricks(volume, 128)
+
+
+#============================================
+@pytest.mark.parametrize("x_size", (63, 64, 65, 128, 129))
+@pytest.mark.parametrize("density", (0.5, 0.95))
+def test_volume_to_bricks_matches_reference_word_boundaries(x_size: int, density: float) -> None:
+	"""
+	Widths around uint64 word boundaries tile the same as the reference.
+	"""
+	volume = _random_volume(x_size, (x_size, 4, 5), density)
+	bricks = hilbert_curve_brick.ldraw.volume_to_bricks(volume, 128)
+	assert bricks.to_list() == _reference_bricks(volume, 128)
+
+
+#============================================
+def test_volume_to_bricks_full_rows_cross_words() -> None:
+	"""
+	Fully occupied rows place bricks across word boundaries like the reference.
+	"""
+	volume = numpy.full((129, 1, 2), 255, dtype=numpy.uint8)
+	bricks = hilbert_curve_brick.ldraw.volume_to_bricks(volume, 128)
+	assert bricks.to_list() == _reference_bricks(volume, 128)
+
+
+#============================================
+def test_volume_to_bricks_reuses_buffers() -> None:
+	"""
+	Reused mask buffers give the same bricks on every call.
+	"""
+	volume = _random_volume(7, (10, 6, 7), 0.7)
+	occupied = numpy.empty(volume.shape, dtype=numpy.bool_)
+	covered = numpy.empty(volume.shape, dtype=numpy.bool_)
+	first = hilbert_curve_brick.ldraw.volume_to_bricks(volume, 128, occupied, covered)
+	second = hilbert_curve_brick.ldraw.volume_to_bricks(volume, 128, occupied, covered)
+	assert first.to_list() == second.to_list()
+	assert first.to_list() == _reference_bricks(volume, 128)
+
+
+#============================================
+def test_tile_choice_table() -> None:
+	"""
+	TILE_CHOICE picks the first footprint that fits the free runs.
+	"""
+	choice = hilbert_curve_brick.ldraw.TILE_CHOICE
+	sizes = hilbert_curve_brick.ldraw.TILE_SIZES.tolist()
+	for run_z in range(1, 4):
+		assert sizes[choice[3, run_z]] == [3, 1]
+	assert sizes[choice[1, 3]] == [1, 3]
+	assert sizes[choice[2, 3]] == [1, 3]
+	assert sizes[choice[2, 1]] == [2, 1]
+	assert sizes[choice[2, 2]] == [2, 1]
+	assert sizes[choice[1, 2]] == [1, 2]
+	assert sizes[choice[1, 1]] == [1, 1]
+
+
+#============================================
+def test_brick_set_indexing() -> None:
+	"""
+	BrickSet indexing and slicing match to_list.
+	"""
+	volume = _random_volume(3, (9, 5, 6), 0.8)
+	bricks = hilbert_curve_brick.ldraw.volume_to_bricks(volume, 128)
+	brick_list = bricks.to_list()
+	assert len(bricks) == len(brick_list)
+	assert bricks[0] == brick_list[0]
+	assert bricks[-1] == brick_list[-1]
+	assert bricks[1:5] == brick_list[1:5]
+	assert bricks[::-2] == brick_list[::-2]
+
+
+#============================================
+def test_volume_to_bricks_covered_out_holds_placed_cells() -> None:
+	"""
+	The coverage buffer ends up marking every placed cell, as in the baseline.
+	"""
+	volume = _random_volume(11, (70, 7, 6), 0.7)
+	covered = numpy.empty(volume.shape, dtype=numpy.bool_)
+	hilbert_curve_brick.ldraw.volume_to_bricks(volume, 128, covered_out=covered)
+	assert numpy.array_equal(covered, volume >= 128)
+
+
+#============================================
+@pytest.mark.parametrize("buffer", (
+	numpy.empty((4, 4, 5), dtype=numpy.bool_),
+	numpy.empty((4, 4, 4), dtype=numpy.uint8),
+))
+def test_volume_to_bricks_rejects_bad_buffers(buffer: numpy.ndarray) -> None:
+	"""
+	Mask buffers of the wrong shape or dtype raise ValueError.
+	"""
+	volume = _random_volume(5, (4, 4, 4), 0.5)
+	with pytest.raises(ValueError):
+		hilbert_curve_brick.ldraw.volume_to_bricks(volume, 128, occupied_out=buffer)
+	with pytest.raises(ValueError):
+		hilbert_curve_brick.ldraw.volume_to_bricks(volume, 128, covered_out=buffer)
+
+
+#============================================
+def test_write_ldraw_exact_bytes(tmp_path) -> None:
+	"""
+	write_ldraw output matches the original text writer byte for byte.
+	"""
+	bricks = hilbert_curve_brick.ldraw.BrickSet(
+		part_ids=numpy.array((3, 0, 1, 2, 2), dtype=numpy.uint8),
+		xs=numpy.array((20, 60, 80, 20, -40), dtype=numpy.int32),
+		ys=numpy.array((36, 12, 12, 36, 12), dtype=numpy.int32),
+		zs=numpy.array((20, 20, 60, 60, 100), dtype=numpy.int32),
+		rot_ids=numpy.array((0, 0, 1, 0, 1), dtype=numpy.uint8),
+	)
+	output_path = tmp_path / "models" / "test.ldr"
+	hilbert_curve_brick.ldraw.write_ldraw(bricks, str(output_path), 15, "Test Model")
+	expected = (
+		b"0 FILE test.ldr\n"
+		b"0 Name: Test Model\n"
+		b"0 Author: hilbert-curve-brick\n"
+		b"0 !LDRAW_ORG Unofficial_Model\n"
+		b"0 !LICENSE Redistributable under CC BY-SA 4.0\n"
+		b"1 15 20 36 20 1 0 0 0 1 0 0 0 1 30145.dat\n"
+		b"1 15 60 12 20 1 0 0 0 1 0 0 0 1 3003.dat\n"
+		b"1 15 80 12 60 0 0 1 0 1 0 -1 0 0 3001.dat\n"
+		b"1 15 20 36 60 1 0 0 0 1 0 0 0 1 2456.dat\n"
+		b"1 15 -40 12 100 0 0 1 0 1 0 -1 0 0 2456.dat\n"
+	)
+	assert output_path.read_bytes() == expected
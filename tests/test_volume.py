@@ -0,0 +1,104 @@
+# Standard Library
+import os
+
+# PIP3 modules
+import numpy
+import pytest
+
+# local repo modules
+import hilbert_curve_brick.volume
+
+
+DIMENSION = 4
+
+
+#============================================
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch) -> str:
+	"""
+	Point the path cache at an empty temporary directory.
+	"""
+	monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+	cache_dir = os.path.join(str(tmp_path), "hilbert-curve-brick")
+	return cache_dir
+
+
+#============================================
+def _assert_fresh_path(path: hilbert_curve_brick.volume.HilbertPath) -> None:
+	"""
+	Check a path against freshly computed coordinates.
+	"""
+	expected = hilbert_curve_brick.volume._compute_path_coords(DIMENSION)
+	coords = numpy.stack((path.xs, path.ys, path.zs))
+	assert coords.dtype == numpy.int32
+	assert numpy.array_equal(coords, expected)
+
+
+#============================================
+def test_build_hilbert_path_writes_versioned_cache(cache_dir: str) -> None:
+	"""
+	The first build saves the path under the versioned name and a second build reads it.
+	"""
+	path = hilbert_curve_brick.volume.build_hilbert_path(DIMENSION)
+	_assert_fresh_path(path)
+	cache_path = hilbert_curve_brick.volume._path_cache_path(DIMENSION)
+	assert os.path.dirname(cache_path) == cache_dir
+	version = hilbert_curve_brick.volume.PATH_CACHE_VERSION
+	assert os.path.basename(cache_path) == f"path_v{version}_{DIMENSION}.npy"
+	assert os.path.isfile(cache_path)
+	_assert_fresh_path(hilbert_curve_brick.volume.build_hilbert_path(DIMENSION))
+
+
+#============================================
+def test_build_hilbert_path_ignores_old_version(cache_dir: str) -> None:
+	"""
+	A cache file from an older layout version is never read.
+	"""
+	os.makedirs(cache_dir)
+	old_path = os.path.join(cache_dir, f"path_v0_{DIMENSION}.npy")
+	numpy.save(old_path, numpy.zeros((3, 2 * DIMENSION ** 3 - 1), dtype=numpy.int32))
+	_assert_fresh_path(hilbert_curve_brick.volume.build_hilbert_path(DIMENSION))
+
+
+#============================================
+@pytest.mark.parametrize("stale", (
+	numpy.zeros((3, 2 * DIMENSION ** 3 - 1), dtype=numpy.int64),
+	numpy.zeros((3, 2 * DIMENSION ** 3 - 2), dtype=numpy.int32),
+	numpy.zeros((2 * DIMENSION ** 3 - 1, 3), dtype=numpy.int32),
+))
+def test_build_hilbert_path_replaces_stale_cache(cache_dir: str, stale: numpy.ndarray) -> None:
+	"""
+	A cache file with the wrong dtype or shape is recomputed and replaced.
+	"""
+	os.makedirs(cache_dir)
+	cache_path = hilbert_curve_brick.volume._path_cache_path(DIMENSION)
+	numpy.save(cache_path, stale)
+	_assert_fresh_path(hilbert_curve_brick.volume.build_hilbert_path(DIMENSION))
+	cached = numpy.load(cache_path)
+	assert cached.dtype == numpy.int32
+	assert cached.shape == (3, 2 * DIMENSION ** 3 - 1)
+
+
+#============================================
+@pytest.mark.skipif(os.geteuid() == 0, reason="root can write to read-only directories")
+def test_build_hilbert_path_read_only_cache_dir(cache_dir: str) -> None:
+	"""
+	An unwritable cache directory still returns the path and leaves no files.
+	"""
+	os.makedirs(cache_dir)
+	os.chmod(cache_dir, 0o500)
+	path = hilbert_curve_brick.volume.build_hilbert_path(DIMENSION)
+	os.chmod(cache_dir, 0o700)
+	_assert_fresh_path(path)
+	assert os.listdir(cache_dir) == []
+
+
+#============================================
+def test_build_hilbert_path_cache_home_is_file(tmp_path, monkeypatch) -> None:
+	"""
+	A cache home that cannot hold directories still returns the path.
+	"""
+	cache_home = tmp_path / "not_a_dir"
+	cache_home.write_text("")
+	monkeypatch.setenv("XDG_CACHE_HOME", str(cache_home))
+	_assert_fresh_path(hilbert_curve_brick.volume.build_hilbert_path(DIMENSION))